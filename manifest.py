@@ -0,0 +1,15 @@
+# Freeze the robot's driver modules into the firmware image, so their
+# bytecode runs from flash instead of being compiled into the heap at boot.
+#
+# Build from a MicroPython checkout with:
+#   make -C ports/esp32 BOARD=ESP32_GENERIC FROZEN_MANIFEST=/path/to/manifest.py
+#
+# Frozen modules are shadowed by files of the same name on the board's
+# filesystem, so do not upload these modules when flashing this firmware.
+
+include("$(PORT_DIR)/boards/manifest.py")
+
+module("utils.py", base_path="src", opt=3)
+module("servo.py", base_path="src", opt=3)
+module("turret.py", base_path="src", opt=3)
+module("tb6612fng.py", base_path="src", opt=3)
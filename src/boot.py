@@ -1,6 +1,7 @@
 from machine import Pin
 import network
 import esp
+import gc
 
 esp.osdebug(None)
 
@@ -42,3 +43,7 @@ def connect_wifi(ssid, password) -> network.WLAN:
 
 
 wifi = connect_accesspoint("nerftank")
+
+# Collect boot garbage and trigger collections early so each one is short
+gc.collect()
+gc.threshold(gc.mem_free() // 4 + gc.mem_alloc())
@@ -2,7 +2,27 @@ from microdot import Microdot, send_file
 from microdot.websocket import with_websocket
 from robot import RobotController
 import asyncio
-import json
+import gc
+import struct
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+# Websocket message types, sent by the client as {"t": type, "d": payload}
+MSG_STICK_DATA = 1
+
+# Binary stick frames: drive y, drive x, turret x, turret y as little-endian
+# int16 values scaled by STICK_SCALE
+STICK_FORMAT = "<4h"
+STICK_SCALE = 0.001
+STICK_SIZE = struct.calcsize(STICK_FORMAT)
+
+# The single page app is served on every connection, so keep it in RAM
+# rather than reading it back from flash each time
+with open("/static/index.html", "rb") as f:
+    INDEX_HTML = f.read()
 
 app = Microdot()
 robot = RobotController(
@@ -13,7 +33,7 @@ robot = RobotController(
 
 @app.route("/")
 async def index(_):
-    return send_file("/static/index.html")
+    return INDEX_HTML, 200, {"Content-Type": "text/html"}
 
 
 @app.route("/static/<path:path>")
@@ -29,14 +49,34 @@ def static(_, path):
 async def websocket(_, ws):
     while True:
         data = await ws.receive()
-        message = json.loads(data)
-        if message["type"] == "stick_data":
-            # print(message["data"])
-            robot.update(message["data"])
+        # when frames have queued up, skip stick frames superseded by newer data
+        while isinstance(data, (bytes, bytearray)) and ws.pending():
+            data = await ws.receive()
+        if isinstance(data, (bytes, bytearray)):
+            if len(data) < STICK_SIZE:
+                continue
+            speed, turn, pan, tilt = struct.unpack_from(STICK_FORMAT, data)
+            robot.command(
+                speed * STICK_SCALE,
+                turn * STICK_SCALE,
+                pan * STICK_SCALE,
+                tilt * STICK_SCALE,
+            )
+            continue
+        try:
+            message = json.loads(data)
+        except ValueError:
+            # malformed frame, ignore it and wait for the next one
+            continue
+        if message["t"] == MSG_STICK_DATA:
+            # [drive y, drive x, turret x, turret y]
+            axes = message["d"]
+            robot.command(axes[0], axes[1], axes[2], axes[3])
 
 
 async def main():
     print("Starting web server")
+    gc.collect()
     server = asyncio.create_task(app.start_server(port=80))
     print("Server successfully started on port 80")
 
@@ -1,5 +1,6 @@
 import binascii
 import hashlib
+import select
 from microdot import Request, Response
 from microdot.microdot import MUTED_SOCKET_ERRORS, print_exception
 from microdot.helpers import wraps
@@ -40,6 +41,7 @@ class WebSocket:
     def __init__(self, request):
         self.request = request
         self.closed = False
+        self._poller = None
 
     async def handshake(self):
         response = self._handshake_response()
@@ -60,6 +62,25 @@ class WebSocket:
             elif data:  # pragma: no branch
                 return data
 
+    def pending(self):
+        """Return ``True`` if more data from the client is already waiting to
+        be read, so that the next call to ``receive()`` will not have to wait
+        for the network.
+
+        This can be used to skip messages that are already stale::
+
+            message = await ws.receive()
+            while ws.pending():
+                message = await ws.receive()
+        """
+        stream = self.request.sock[0]
+        if hasattr(stream, "s"):  # MicroPython asyncio stream
+            if self._poller is None:
+                self._poller = select.poll()
+                self._poller.register(stream.s, select.POLLIN)
+            return bool(self._poller.poll(0))
+        return bool(getattr(stream, "_buffer", None))  # pragma: no cover
+
     async def send(self, data, opcode=None):
         """Send a message to the client.
 
@@ -0,0 +1,85 @@
+"""
+Shift register output driven by an RP2040 PIO state machine
+"""
+
+import rp2
+import utime as time
+from utils import MSB_FIRST, LSB_FIRST, ShiftRegisterOutput
+
+
+@rp2.asm_pio(
+    out_init=rp2.PIO.OUT_LOW,
+    sideset_init=rp2.PIO.OUT_LOW,
+    out_shiftdir=rp2.PIO.SHIFT_LEFT,
+    autopull=True,
+    pull_thresh=8,
+)
+def _shift_out_program():
+    # data changes while the clock is low and is latched on the rising edge
+    out(pins, 1).side(0)
+    nop().side(1)
+
+
+class PIOShiftRegister(ShiftRegisterOutput):
+    """
+    A write-only shift register whose output is clocked by a PIO state machine.
+
+    Writes are handed to the state machine's FIFO in one call instead of
+    bit-banging each bit from Python. The data and clock pins are taken
+    over by the PIO, so unlike utils.ShiftRegister there is no read().
+    """
+
+    # state machine cycles taken to clock out one byte
+    CYCLES_PER_BYTE = 16
+
+    def __init__(
+        self,
+        data_pin,
+        clock_pin,
+        latch_pin,
+        num_bytes=1,
+        bit_order=MSB_FIRST,
+        state_machine=0,
+        freq=10_000_000,
+    ):
+        """
+        Initialize the shift register.
+
+        Args:
+            data_pin: Pin connected to the register's serial data input
+            clock_pin: Pin connected to the register's shift clock
+            latch_pin: Pin connected to the register's storage (latch) clock
+            num_bytes: Number of daisy-chained bytes
+            bit_order: MSB_FIRST or LSB_FIRST
+            state_machine: ID of the PIO state machine to use (0-7)
+            freq: State machine frequency in Hz
+        """
+        super().__init__(latch_pin, num_bytes, bit_order)
+        lsb_first = self.bit_order == LSB_FIRST
+
+        # bytes are shifted out of the top of the 32-bit output register
+        # for MSB first, and out of the bottom for LSB first
+        self._put_shift = 0 if lsb_first else 24
+        # time for the state machine to finish the byte it is shifting
+        self._drain_us = self.CYCLES_PER_BYTE * 1_000_000 // freq + 1
+
+        self._sm = rp2.StateMachine(
+            state_machine,
+            _shift_out_program,
+            freq=freq,
+            out_base=data_pin,
+            sideset_base=clock_pin,
+            out_shiftdir=rp2.PIO.SHIFT_RIGHT if lsb_first else rp2.PIO.SHIFT_LEFT,
+        )
+        self._sm.active(1)
+
+    def _shift_out_state(self):
+        sm = self._sm
+        self._latch(0)
+        sm.put(self.current_state, self._put_shift)
+        # wait for the FIFO to drain and the last byte to be clocked out
+        while sm.tx_fifo():
+            pass
+        time.sleep_us(self._drain_us)
+        self._latch(1)
+        self._latch(0)
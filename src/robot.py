@@ -1,6 +1,7 @@
-from tb6612fng import Motor
+from tb6612fng import Motor, MultiPwmMotor
 from turret import Turret
 import utils
+import uasyncio as asyncio
 
 
 class RobotController:
@@ -11,39 +12,45 @@ class RobotController:
         :param left_motor_pins: List of pin numbers for the left motors
         :param right_motor_pins: List of pin numbers for the right motors
         """
-        self.left_motors = [Motor(pin[0], pin[1], pin[2]) for pin in left_motor_pins]
-        self.right_motors = [Motor(pin[0], pin[1], pin[2]) for pin in right_motor_pins]
+        self.left_motors = self._create_motors(left_motor_pins)
+        self.right_motors = self._create_motors(right_motor_pins)
 
         self.turret = Turret(pan=19, tilt=18, trigger=23, fire=4)
 
-    @staticmethod
-    def _apply_deadzone(value, deadzone):
-        """Helper method to handle deadzone and rescaling"""
-        if abs(value) < deadzone:
-            return 0.0
+        # deadzone applied to the drive stick, and the factor used to rescale
+        # the remaining range back to [0, 1]
+        self._deadzone = 0.1
+        self._deadzone_scale = 1.0 / (1.0 - self._deadzone)
 
-        sign = 1 if value > 0 else -1
-        # Rescale the remaining range using max_value
-        scaled = (abs(value) - deadzone) / (1 - deadzone)
-        return sign * scaled
+        # latest stick axes from the client, applied by the control loop
+        self._command = [0.0, 0.0, 0.0, 0.0]
+        self._command_ready = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
 
     @staticmethod
-    def ramp_cubic(value, deadzone=0.0):
-        if abs(value) < deadzone:
-            return 0.0
-        # Apply deadzone and rescale
-        value = RobotController._apply_deadzone(value, deadzone)
+    def _create_motors(motor_pins: list) -> list:
+        """
+        Create motor drivers, sharing one driver between motors wired to the
+        same direction pins.
 
-        # Apply cubic function
-        ramped = value * value * value
-        return float(ramped)
+        :param motor_pins: List of (in1, in2, pwm) pin tuples
+        """
+        groups = {}
+        for in1, in2, pwm in motor_pins:
+            groups.setdefault((in1, in2), []).append(pwm)
+
+        motors = []
+        for (in1, in2), pwms in groups.items():
+            if len(pwms) == 1:
+                motors.append(Motor(in1, in2, pwms[0]))
+            else:
+                motors.append(MultiPwmMotor(in1, in2, pwms))
+        return motors
 
     @staticmethod
     def ramp_quadratic(value, deadzone=0.0):
-        if abs(value) < deadzone:
-            return 0.0
         # Apply deadzone and rescale
-        value = RobotController._apply_deadzone(value, deadzone)
+        value = utils.apply_deadzone(value, deadzone, 1.0 / (1.0 - deadzone))
         # Apply quadratic function
         sign = 1 if value >= 0 else -1
         ramped = value * value
@@ -51,10 +58,8 @@ class RobotController:
 
     @staticmethod
     def ramp_exponential(value, deadzone=0.0, exponent=1.5):
-        if abs(value) < deadzone:
-            return 0
         # Apply deadzone and rescale
-        value = RobotController._apply_deadzone(value, deadzone)
+        value = utils.apply_deadzone(value, deadzone, 1.0 / (1.0 - deadzone))
         # Apply exponential function
         sign = 1 if value >= 0 else -1
         value = abs(value)
@@ -62,24 +67,61 @@ class RobotController:
         return int(sign * ramped)
 
     def update(self, data: dict):
-        speed = float(data["drive"]["y"])
-        turn = float(data["drive"]["x"])
-        pan = float(data["turret"]["x"])
-        tilt = float(data["turret"]["y"])
+        self.fast_update(
+            float(data["drive"]["y"]),
+            float(data["drive"]["x"]),
+            float(data["turret"]["x"]),
+            float(data["turret"]["y"]),
+        )
+
+    def fast_update(self, speed: float, turn: float, pan: float, tilt: float):
+        """
+        Update the drive and turret from raw stick axes, each in [-1, 1].
 
+        :param speed: Drive stick y axis
+        :param turn: Drive stick x axis
+        :param pan: Turret stick x axis
+        :param tilt: Turret stick y axis
+        """
         # clip values to [-1, 1]
-        speed = utils.constrain(speed, -1, 1)
-        turn = utils.constrain(turn, -1, 1)
         pan = utils.constrain(pan, -1, 1)
         tilt = utils.constrain(tilt, -1, 1)
 
-        # apply a ramp function with a small deadzone
-        speed = self._apply_deadzone(speed, 0.1)
-        turn = self._apply_deadzone(turn, 0.1)
+        # apply a small deadzone and map straight to motor speeds
+        speed = utils.axis_to_duty(speed, self._deadzone, self._deadzone_scale, 1023)
+        turn = utils.axis_to_duty(turn, self._deadzone, self._deadzone_scale, 511)
 
-        self.drive(speed, turn)
+        self._set_motors(speed + turn, speed - turn)
         self.turret.move(pan, tilt)
 
+    def command(self, speed: float, turn: float, pan: float, tilt: float):
+        """
+        Queue stick axes for the control loop, replacing any pending command.
+
+        :param speed: Drive stick y axis
+        :param turn: Drive stick x axis
+        :param pan: Turret stick x axis
+        :param tilt: Turret stick y axis
+        """
+        command = self._command
+        command[0] = speed
+        command[1] = turn
+        command[2] = pan
+        command[3] = tilt
+        self._command_ready.set()
+
+    async def run(self):
+        while True:
+            try:
+                await self._command_ready.wait()
+                self._command_ready.clear()
+                command = self._command
+                self.fast_update(command[0], command[1], command[2], command[3])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print("Error in robot control loop:", e)
+
     def drive(self, speed: float, turn: float):
         """
         Drive the robot.
@@ -87,24 +129,22 @@ class RobotController:
         :param speed: Speed of the robot (-1 to 1)
         :param turn: Turn of the robot (-1 to 1)
         """
-        speed = utils.map_range(speed, -1, 1, -1023, 1023)
-        turn = utils.map_range(turn, -1, 1, -511, 511)
+        # both ranges are symmetric about zero, so mapping is a single multiply
+        speed = speed * 1023
+        turn = turn * 511
+
+        self._set_motors(speed + turn, speed - turn)
 
-        left_speed = utils.constrain(speed + turn, -1023, 1023)
-        right_speed = utils.constrain(speed - turn, -1023, 1023)
+    def _set_motors(self, left_speed, right_speed):
+        """
+        Set the left and right motor speeds.
 
+        :param left_speed: Speed of the left motors (-1023 to 1023)
+        :param right_speed: Speed of the right motors (-1023 to 1023)
+        """
+        # Motor.drive clamps the magnitude, so no constrain is needed here
         for motor in self.left_motors:
-            if left_speed > 0:
-                motor.forward(left_speed)
-            elif left_speed < 0:
-                motor.reverse(abs(left_speed))
-            else:
-                motor.stop()
+            motor.drive(left_speed)
 
         for motor in self.right_motors:
-            if right_speed > 0:
-                motor.forward(right_speed)
-            elif right_speed < 0:
-                motor.reverse(abs(right_speed))
-            else:
-                motor.stop()
+            motor.drive(right_speed)
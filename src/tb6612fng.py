@@ -3,19 +3,84 @@ TB6612FNG Single Motor Control Class for MicroPython
 """
 
 from machine import Pin, PWM
-from typing import Optional
+import array
+import micropython
+import os
+
+# The original ESP32 exposes write-1-to-set/clear registers for its GPIO
+# outputs, split into banks for pins 0-31 and 32-39
+_DIRECT_GPIO = os.uname().machine.endswith("ESP32")
+
+
+@micropython.viper
+def _gpio_write(set_lo: int, clr_lo: int, set_hi: int, clr_hi: int):
+    """Set and clear GPIO outputs on the ESP32 with four register stores."""
+    ptr32(0x3FF44008)[0] = set_lo  # GPIO_OUT_W1TS_REG
+    ptr32(0x3FF4400C)[0] = clr_lo  # GPIO_OUT_W1TC_REG
+    ptr32(0x3FF44014)[0] = set_hi  # GPIO_OUT1_W1TS_REG
+    ptr32(0x3FF44018)[0] = clr_hi  # GPIO_OUT1_W1TC_REG
+
+
+# Output pins shared between motors, keyed by pin number
+_output_pins = {}
+
+# Number of running motors on each standby pin. A shared standby pin is
+# only pulled low once every motor using it has stopped.
+_standby_running = {}
+
+
+def _output_pin(pin: int) -> Pin:
+    """
+    Get the output Pin for a pin number, creating it on first use.
+
+    Args:
+        pin: Pin number
+
+    Returns:
+        The Pin shared by every motor using this pin number
+    """
+    if pin not in _output_pins:
+        _output_pins[pin] = Pin(pin, Pin.OUT)
+    return _output_pins[pin]
+
+
+def _direction_masks(in1: int, in2: int) -> list:
+    """
+    Build the _gpio_write arguments for each direction state.
+
+    Args:
+        in1: First input pin number
+        in2: Second input pin number
+
+    Returns:
+        A (set_lo, clr_lo, set_hi, clr_hi) tuple per direction state
+    """
+    masks = []
+    for direction in range(4):
+        regs = [0, 0, 0, 0]
+        for pin, level in ((in1, direction & 1), (in2, direction >> 1)):
+            bank = 2 if pin >= 32 else 0
+            regs[bank + (0 if level else 1)] |= 1 << (pin & 31)
+        masks.append(tuple(regs))
+    return masks
 
 
 class Motor:
     PWM_MAX = 65535
     SPEED_MAX = 1023
 
+    # Direction states, encoded as the (in2, in1) pin levels
+    _STOP = 0b00
+    _FORWARD = 0b01
+    _REVERSE = 0b10
+    _BRAKE = 0b11
+
     def __init__(
         self,
         in1: int,
         in2: int,
         pwm: int,
-        stby: Optional[int] = None,
+        stby: "int | None" = None,
         offset: float = 0.0,
     ) -> None:
         """
@@ -28,13 +93,31 @@ class Motor:
             stby: Standby pin number (can be shared between multiple motors)
             offset: Speed offset for motor calibration (0-1)
         """
-        self.in1 = Pin(in1, Pin.OUT)
-        self.in2 = Pin(in2, Pin.OUT)
+        self.in1 = _output_pin(in1)
+        self.in2 = _output_pin(in2)
         self.pwm = PWM(Pin(pwm, Pin.OUT))
-        self.stby = Pin(stby, Pin.OUT) if stby else None
+        self.stby = _output_pin(stby) if stby else None
         self.offset = offset
+        self._direction_masks = _direction_masks(in1, in2) if _DIRECT_GPIO else None
+        # Calibrated 0-65535 duty cycle for every speed from 0-1023
+        duty_scale = self.PWM_MAX * (1 - offset) / self.SPEED_MAX
+        self._duty_table = array.array(
+            "H", [int(speed * duty_scale) for speed in range(self.SPEED_MAX + 1)]
+        )
+        # Bound pin methods, cached to skip the lookups on every write
+        self._in1 = self.in1.value
+        self._in2 = self.in2.value
+        self._stby = self.stby.value if self.stby else None
+        self._stby_pin = stby
+        if stby:
+            _standby_running.setdefault(stby, 0)
+        self._duty_u16 = self.pwm.duty_u16
+        # Last values written to the pins, used to skip redundant writes
+        self._last_direction = -1
+        self._last_duty = -1
         self.stop()  # Ensure motor starts in stopped state
 
+    @micropython.native
     def _set_speed(self, speed: float) -> int:
         """
         Convert and constrain speed value.
@@ -45,23 +128,52 @@ class Motor:
         Returns:
             Adjusted PWM duty cycle value
         """
-        speed = max(0, min(self.SPEED_MAX, speed))  # Constrain speed
-        # Map speed from 0-1023 to 0-65535
-        return int((speed / self.SPEED_MAX) * self.PWM_MAX * (1 - self.offset))
+        if speed < 0:
+            speed = 0
+        elif speed > self.SPEED_MAX:
+            speed = self.SPEED_MAX
+        return self._duty_table[int(speed)]
 
-    def _set_direction(self, forward: bool, speed: float) -> None:
+    def _write(self, direction: int, duty: int) -> None:
         """
-        Set motor direction and speed.
+        Apply a direction state and duty cycle, skipping unchanged pins.
 
         Args:
-            forward: True for forward, False for reverse
-            speed: Motor speed (0-1023)
+            direction: One of the _STOP, _FORWARD, _REVERSE or _BRAKE states
+            duty: PWM duty cycle (0-65535)
+        """
+        if direction != self._last_direction:
+            if self._stby:
+                self._update_standby(
+                    self._last_direction > self._STOP, direction != self._STOP
+                )
+            self._last_direction = direction
+            masks = self._direction_masks
+            if masks:
+                masks = masks[direction]
+                _gpio_write(masks[0], masks[1], masks[2], masks[3])
+            else:
+                self._in1(direction & 1)
+                self._in2(direction >> 1)
+        if duty != self._last_duty:
+            self._last_duty = duty
+            self._duty_u16(duty)
+
+    def _update_standby(self, was_running: bool, running: bool) -> None:
         """
-        self.in1.value(forward)
-        self.in2.value(not forward)
-        self.pwm.duty_u16(self._set_speed(speed))
-        if self.stby:
-            self.stby.value(1)
+        Update the shared standby pin when this motor starts or stops.
+
+        Args:
+            was_running: Whether the motor was out of the stop state
+            running: Whether the motor is now out of the stop state
+        """
+        count = _standby_running[self._stby_pin]
+        if running and not was_running:
+            count += 1
+        elif was_running and not running:
+            count -= 1
+        _standby_running[self._stby_pin] = count
+        self._stby(count > 0)
 
     def forward(self, speed: float) -> None:
         """
@@ -70,7 +182,7 @@ class Motor:
         Args:
             speed: Motor speed (0-1023)
         """
-        self._set_direction(True, speed)
+        self._write(self._FORWARD, self._set_speed(speed))
 
     def reverse(self, speed: float) -> None:
         """
@@ -79,18 +191,63 @@ class Motor:
         Args:
             speed: Motor speed (0-1023)
         """
-        self._set_direction(False, speed)
+        self._write(self._REVERSE, self._set_speed(speed))
+
+    def drive(self, speed: float) -> None:
+        """
+        Run motor at a signed speed, stopping it at zero.
+
+        Args:
+            speed: Motor speed (-1023-1023), negative for reverse
+        """
+        if speed > 0:
+            self._write(self._FORWARD, self._set_speed(speed))
+        elif speed < 0:
+            self._write(self._REVERSE, self._set_speed(-speed))
+        else:
+            self._write(self._STOP, 0)
 
     def stop(self) -> None:
         """Stop the motor by setting both inputs and PWM low."""
-        self.in1.value(0)
-        self.in2.value(0)
-        self.pwm.duty_u16(0)
-        if self.stby:
-            self.stby.value(0)
+        self._write(self._STOP, 0)
 
     def brake(self) -> None:
         """Actively brake the motor by setting both inputs high."""
-        self.in1.value(1)
-        self.in2.value(1)
-        self.pwm.duty_u16(0)
+        self._write(self._BRAKE, 0)
+
+
+class MultiPwmMotor(Motor):
+    """
+    Several motors sharing one pair of direction pins, each with its own PWM pin.
+
+    The direction pins are written once per update for the whole group.
+    """
+
+    def __init__(
+        self,
+        in1: int,
+        in2: int,
+        pwms: list,
+        stby: "int | None" = None,
+        offset: float = 0.0,
+    ) -> None:
+        """
+        Initialize a group of motors.
+
+        Args:
+            in1: First input pin number
+            in2: Second input pin number
+            pwms: PWM control pin numbers, one per motor
+            stby: Standby pin number (can be shared between multiple motors)
+            offset: Speed offset for motor calibration (0-1)
+        """
+        # Must exist before Motor.__init__ stops the motors via _write
+        self._extra_pwms = [PWM(Pin(pwm, Pin.OUT)) for pwm in pwms[1:]]
+        self._extra_duty_u16 = [pwm.duty_u16 for pwm in self._extra_pwms]
+        super().__init__(in1, in2, pwms[0], stby, offset)
+
+    def _write(self, direction: int, duty: int) -> None:
+        if duty != self._last_duty:
+            for duty_u16 in self._extra_duty_u16:
+                duty_u16(duty)
+        super()._write(direction, duty)
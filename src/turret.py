@@ -1,6 +1,8 @@
 from servo import Servo
 from machine import Pin, PWM
-import utils
+import array
+import micropython
+from micropython import const
 import uasyncio as asyncio
 
 PAN_MIN = 500
@@ -10,13 +12,65 @@ TILT_MAX = 2000
 TRIGGER_MIN = 1400
 TRIGGER_MAX = 2500
 
-# Replace enum with string constants
-STATE_STANDBY = "STANDBY"
-STATE_SPIN_UP = "SPIN_UP"
-STATE_READY = "READY"
-STATE_FIRING = "FIRING"
-STATE_COOLDOWN = "COOLDOWN"
-STATE_EMPTY = "EMPTY"
+# Map stick positions in [-1, 1] to pulse widths as position * scale + bias
+_PAN_SCALE = (PAN_MAX - PAN_MIN) / 2
+_PAN_BIAS = (PAN_MAX + PAN_MIN) / 2
+_TILT_SCALE = (TILT_MAX - TILT_MIN) / 2
+_TILT_BIAS = (TILT_MAX + TILT_MIN) / 2
+
+# Stick positions are quantised to this many steps either side of centre
+# and looked up in precomputed pulse width tables
+_PULSE_STEPS = const(128)
+
+
+def _pulse_table(scale, bias):
+    return array.array(
+        "H",
+        [
+            int((i / _PULSE_STEPS - 1) * scale + bias)
+            for i in range(2 * _PULSE_STEPS + 1)
+        ],
+    )
+
+
+@micropython.native
+def _pulse_index(position):
+    index = int(position * _PULSE_STEPS + _PULSE_STEPS + 0.5)
+    if index < 0:
+        return 0
+    if index > 2 * _PULSE_STEPS:
+        return 2 * _PULSE_STEPS
+    return index
+
+
+_PAN_PULSES = _pulse_table(_PAN_SCALE, _PAN_BIAS)
+_TILT_PULSES = _pulse_table(_TILT_SCALE, _TILT_BIAS)
+
+# Replace enum with integer constants, usable as tuple indices
+STATE_STANDBY = const(0)
+STATE_SPIN_UP = const(1)
+STATE_READY = const(2)
+STATE_FIRING = const(3)
+STATE_COOLDOWN = const(4)
+STATE_EMPTY = const(5)
+
+# State that each state advances to while armed and loaded. READY only
+# advances once the turret has been fired.
+_NEXT_STATE = (
+    STATE_SPIN_UP,  # STANDBY
+    STATE_READY,  # SPIN_UP
+    STATE_FIRING,  # READY
+    STATE_COOLDOWN,  # FIRING
+    STATE_READY,  # COOLDOWN
+    STATE_STANDBY,  # EMPTY
+)
+
+# Turret flags
+_ARMED = const(1)
+_FIRING = const(2)
+
+# Pause after an error before the state machine runs again
+_ERROR_DELAY_MS = const(1000)
 
 
 class Turret:
@@ -31,78 +85,82 @@ class Turret:
         self.trigger_servo.write_microseconds(TRIGGER_MAX)
 
         self._state = STATE_STANDBY
-        self._armed = asyncio.Event()
-        self._firing = asyncio.Event()
+        self._flags = 0
+        # set whenever the flags change, to wake the state machine from
+        # idle states
+        self._changed = asyncio.Event()
         self._ammo = 5
+        # behaviour for each state, indexed by state
+        self._state_behaviours = (
+            self._standby,
+            self._spin_up,
+            self._ready,
+            self._fire,
+            self._cooldown,
+            self._empty,
+        )
         self._task = asyncio.create_task(self.run())
 
     def _get_next_state(self):
         if self._ammo < 1:
             self._state = STATE_EMPTY
 
-        elif not self._armed.is_set():
+        elif not self._flags & _ARMED:
             self._state = STATE_STANDBY
 
-        elif self._state == STATE_STANDBY:
-            self._state = STATE_SPIN_UP
+        elif self._state != STATE_READY or self._flags & _FIRING:
+            self._state = _NEXT_STATE[self._state]
 
-        elif self._state == STATE_SPIN_UP:
-            self._state = STATE_READY
-
-        elif self._state == STATE_READY:
-            if self._firing.is_set():
-                self._state = STATE_FIRING
-
-        elif self._state == STATE_FIRING:
-            self._state = STATE_COOLDOWN
-
-        elif self._state == STATE_COOLDOWN:
-            self._state = STATE_READY
+    async def _execute_state_behaviour(self):
+        await self._state_behaviours[self._state]()
+
+    async def _standby(self):
+        # firing motor is off and wait for arming
+        self.fire_motor.duty_u16(0)
+        if not self._flags & _ARMED:
+            await self._wait_for_change()
+
+    async def _spin_up(self):
+        # spin up firing motor
+        self.fire_motor.duty_u16(1 << 15)
+
+    async def _ready(self):
+        # wait to be fired or disarmed
+        if not self._flags & _FIRING:
+            await self._wait_for_change()
+
+    async def _fire(self):
+        # activate trigger, decrement ammo counter, and clear firing flag
+        self.trigger_servo.write_microseconds(TRIGGER_MIN)
+        self._ammo -= 1
+        self._flags &= ~_FIRING
+        await asyncio.sleep_ms(100)
+
+    async def _cooldown(self):
+        # withdraw trigger and cooldown before next shot
+        self.trigger_servo.write_microseconds(TRIGGER_MAX)
+        await asyncio.sleep_ms(100)
 
-        else:
-            raise ValueError(f"Unknown state: {self._state}")
+    async def _empty(self):
+        # no ammuntion, do nothing
+        self.fire_motor.duty_u16(0)
+        await self._wait_for_change()
 
-    async def _execute_state_behaviour(self):
-        if self._state == STATE_STANDBY:
-            # firing motor is off and wait for arming
-            self.fire_motor.duty_u16(0)
-            await self._armed.wait()
-
-        elif self._state == STATE_SPIN_UP:
-            # spin up firing motor
-            self.fire_motor.duty_u16(1 << 15)
-
-        elif self._state == STATE_READY:
-            # do nothing
-            pass
-
-        elif self._state == STATE_FIRING:
-            # activate trigger, decrement ammo counter, and clear firing event
-            self.trigger_servo.write_microseconds(TRIGGER_MIN)
-            self._ammo -= 1
-            self._firing.clear()
-            await asyncio.sleep_ms(100)
-
-        elif self._state == STATE_COOLDOWN:
-            # withdraw trigger and cooldown before next shot
-            self.trigger_servo.write_microseconds(TRIGGER_MAX)
-            await asyncio.sleep_ms(100)
-
-        elif self._state == STATE_EMPTY:
-            # no ammuntion, do nothing
-            self.fire_motor.duty_u16(0)
-
-        else:
-            raise ValueError(f"Unknown state: {self._state}")
+    async def _wait_for_change(self):
+        await self._changed.wait()
+        self._changed.clear()
 
     def arm(self):
-        self._armed.set()
+        self._flags |= _ARMED
+        self._changed.set()
 
     def disarm(self):
-        self._armed.clear()
+        self._flags &= ~_ARMED
+        self._changed.set()
 
     def fire(self):
-        self._firing.set()
+        self._flags |= _FIRING
+        self._changed.set()
 
     @property
     def ammo(self):
@@ -114,23 +172,20 @@ class Turret:
 
     @property
     def is_armed(self):
-        return self._armed.is_set()
+        return bool(self._flags & _ARMED)
 
     async def run(self):
         while True:
             try:
                 self._get_next_state()
                 await self._execute_state_behaviour()
-                await asyncio.sleep_ms(0)
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                print(f"Error in turret state machine: {e}")
-                await asyncio.sleep(1)
+                print("Error in turret state machine:", e)
+                await asyncio.sleep_ms(_ERROR_DELAY_MS)
 
+    @micropython.native
     def move(self, pan, tilt):
-        pan = utils.map_range(pan, -1, 1, PAN_MIN, PAN_MAX)
-        tilt = utils.map_range(tilt, -1, 1, TILT_MIN, TILT_MAX)
-
-        pan = self.pan_servo.write_microseconds(pan)
-        tilt = self.tilt_servo.write_microseconds(tilt)
+        self.pan_servo.write_microseconds(_PAN_PULSES[_pulse_index(pan)])
+        self.tilt_servo.write_microseconds(_TILT_PULSES[_pulse_index(tilt)])
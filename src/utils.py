@@ -1,63 +1,134 @@
 from machine import Pin
+import micropython
 import utime as time
 
 # Constants to replace enum
 MSB_FIRST = 0
 LSB_FIRST = 1
 
+def _norm_order(bit_order):
+    """
+    Converts an Arduino-style "MSBFIRST"/"LSBFIRST" bit order to a constant.
+    """
+    if isinstance(bit_order, str):
+        return MSB_FIRST if bit_order == "MSBFIRST" else LSB_FIRST
+    return bit_order
+
+# Busy-wait iterations to hold each shift register clock and latch level,
+# see set_shift_delay()
+_shift_delay = 0
+
+@micropython.native
 def constrain(x, min_val, max_val):
     """
     Constrains a number between a minimum and maximum value.
     """
-    return max(min_val, min(x, max_val))
+    if x < min_val:
+        return min_val
+    if x > max_val:
+        return max_val
+    return x
 
+@micropython.native
 def map_range(x, in_min, in_max, out_min, out_max):
     """
     Maps a value from one range to another.
     """
     return (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
 
+@micropython.native
+def apply_deadzone(value, deadzone, scale):
+    """
+    Zeroes a value inside the deadzone and rescales the remaining range.
+
+    scale is the precomputed 1 / (1 - deadzone).
+    """
+    if value >= deadzone:
+        return (value - deadzone) * scale
+    if value <= -deadzone:
+        return (value + deadzone) * scale
+    return 0.0
+
+@micropython.native
+def axis_to_duty(value, deadzone, scale, out_max):
+    """
+    Converts a stick axis to a signed duty in [-out_max, out_max].
+
+    Clamps, applies the deadzone and rescales in a single pass. scale is
+    the precomputed 1 / (1 - deadzone).
+    """
+    if value >= deadzone:
+        value = (value - deadzone) * scale
+        return out_max if value >= 1.0 else int(value * out_max)
+    if value <= -deadzone:
+        value = (value + deadzone) * scale
+        return -out_max if value <= -1.0 else int(value * out_max)
+    return 0
+
+# Every byte value with its bits reversed
+_REVERSED_BYTES = bytes(
+    sum(((v >> i) & 1) << (7 - i) for i in range(8)) for v in range(256)
+)
+
 def reverse_bits(value, bits=8):
     """
     Reverses the bits in a value.
     """
+    if bits == 8:
+        return _REVERSED_BYTES[value & 0xFF]
+
+    # reverse whole bytes, then drop the padding from the low end
     result = 0
-    for i in range(bits):
-        result = (result << 1) | ((value >> i) & 1)
-    return result
+    for _ in range((bits + 7) // 8):
+        result = (result << 8) | _REVERSED_BYTES[value & 0xFF]
+        value >>= 8
+    return result >> (-bits & 7)
+
+# Bits of every byte value, most significant first. Built on first use as
+# it takes around 12 KB of heap.
+_byte_bits = None
+
+def _byte_bits_table():
+    global _byte_bits
+    if _byte_bits is None:
+        _byte_bits = [tuple((v >> (7 - i)) & 1 for i in range(8)) for v in range(256)]
+    return _byte_bits
 
 def bytes_to_bits(values):
     """
     Converts a list of bytes to a list of bits.
     """
     bits = []
+    extend = bits.extend
+    table = _byte_bits_table()
     for value in values:
-        for i in range(8):
-            bits.append((value >> (7 - i)) & 1)
+        extend(table[value & 0xFF])
     return bits
 
+@micropython.native
 def bits_to_bytes(bits, bit_order=MSB_FIRST):
     """
-    Converts a list of bits to bytes.
+    Converts a list of bits to bytes, padding the last byte with zeros.
     """
-    while len(bits) % 8:
-        bits.append(0)
-
-    bytes_list = []
-    for i in range(0, len(bits), 8):
-        byte = 0
-        byte_bits = bits[i:i + 8]
-        if bit_order == LSB_FIRST:
-            byte_bits.reverse()
-        for bit in byte_bits:
-            byte = (byte << 1) | (bit & 1)
-        bytes_list.append(byte)
-    return bytes_list
+    count = len(bits)
+    out = bytearray((count + 7) // 8)
+    if bit_order == LSB_FIRST:
+        for i in range(count):
+            if bits[i] & 1:
+                out[i >> 3] |= 1 << (i & 7)
+    else:
+        for i in range(count):
+            if bits[i] & 1:
+                out[i >> 3] |= 0x80 >> (i & 7)
+    return out
 
 def parallel_to_serial(parallel_data, num_bits=8):
     """
     Converts parallel data to serial format.
     """
+    if num_bits == 8:
+        return bytes_to_bits(parallel_data)
+
     serial_data = []
     for value in parallel_data:
         for i in range(num_bits):
@@ -68,24 +139,55 @@ def shift_out_multiple(data_pin, clock_pin, latch_pin, values, bit_order=MSB_FIR
     """
     Shifts out multiple bytes of data with latching.
     """
-    latch_pin.value(0)
-    for value in values:
-        shift_out(data_pin, clock_pin, value, bit_order)
-    latch_pin.value(1)
-    time.sleep_us(1)
-    latch_pin.value(0)
+    _shift_out_bytes(data_pin.value, clock_pin.value, latch_pin.value,
+                     values, _norm_order(bit_order))
 
 def shift_in_multiple(data_pin, clock_pin, latch_pin, num_bytes, bit_order=MSB_FIRST):
     """
     Shifts in multiple bytes of data with latching.
     """
-    latch_pin.value(1)
-    time.sleep_us(1)
-    latch_pin.value(0)
+    return _shift_in_bytes(data_pin.value, clock_pin.value, latch_pin.value,
+                           num_bytes, _norm_order(bit_order))
+
+@micropython.native
+def _shift_out_bytes(data, clock, latch, values, bit_order):
+    """
+    Shifts out and latches bytes using the pins' bound value methods.
+    """
+    delay = _shift_delay
+
+    latch(0)
+    if delay:
+        for value in values:
+            _shift_out_delayed(data, clock, constrain(value, 0, 255), bit_order)
+    else:
+        shift = _shift_out_msb if bit_order == MSB_FIRST else _shift_out_lsb
+        for value in values:
+            shift(data, clock, constrain(value, 0, 255))
+    latch(1)
+    _hold(delay)
+    latch(0)
+
+@micropython.native
+def _shift_in_bytes(data, clock, latch, num_bytes, bit_order):
+    """
+    Latches and shifts in bytes using the pins' bound value methods.
+    """
+    delay = _shift_delay
+
+    latch(1)
+    _hold(delay)
+    latch(0)
 
     values = []
-    for _ in range(num_bytes):
-        values.append(shift_in(data_pin, clock_pin, bit_order))
+    append = values.append
+    if delay:
+        for _ in range(num_bytes):
+            append(_shift_in_delayed(data, clock, bit_order))
+    else:
+        shift = _shift_in_msb if bit_order == MSB_FIRST else _shift_in_lsb
+        for _ in range(num_bytes):
+            append(shift(data, clock))
     return values
 
 def debounce(pin, delay_ms=20):
@@ -96,26 +198,35 @@ def debounce(pin, delay_ms=20):
     time.sleep_ms(delay_ms)
     return pin.value() == initial_state
 
-class ShiftRegister:
-    """Class to manage a shift register device."""
-    
-    def __init__(self, data_pin, clock_pin, latch_pin, num_bytes=1, bit_order=MSB_FIRST):
-        self.data_pin = data_pin
-        self.clock_pin = clock_pin
+@micropython.native
+def _store_bytes(buffer, values):
+    """
+    Copies values into a byte buffer, clamping each one to 0-255.
+    """
+    for i in range(len(buffer)):
+        value = values[i]
+        buffer[i] = 0 if value < 0 else (255 if value > 255 else value)
+
+class ShiftRegisterOutput:
+    """
+    Output buffer shared by the shift register drivers.
+
+    Holds the state of every output bit and checks writes against it.
+    Subclasses clock the buffer out to the hardware in _shift_out_state().
+    """
+
+    def __init__(self, latch_pin, num_bytes=1, bit_order=MSB_FIRST):
         self.latch_pin = latch_pin
         self.num_bytes = num_bytes
-        self.bit_order = bit_order
-        self.current_state = [0] * num_bytes
+        self.bit_order = _norm_order(bit_order)
+        self.current_state = bytearray(num_bytes)
+        self._latch = latch_pin.value
 
     def write(self, values):
         if len(values) != self.num_bytes:
             raise ValueError(f"Expected {self.num_bytes} bytes, got {len(values)}")
-        self.current_state = values
-        shift_out_multiple(self.data_pin, self.clock_pin, self.latch_pin, values, self.bit_order)
-
-    def read(self):
-        return shift_in_multiple(self.data_pin, self.clock_pin, self.latch_pin, 
-                               self.num_bytes, self.bit_order)
+        _store_bytes(self.current_state, values)
+        self._shift_out_state()
 
     def set_bit(self, byte_index, bit_index, value):
         if not 0 <= byte_index < self.num_bytes:
@@ -128,53 +239,240 @@ class ShiftRegister:
         else:
             self.current_state[byte_index] &= ~(1 << bit_index)
 
-        self.write(self.current_state)
+        self._shift_out_state()
 
-def shift_out(data_pin, clock_pin, value, bit_order=MSB_FIRST):
+    def _shift_out_state(self):
+        raise NotImplementedError
+
+class ShiftRegister(ShiftRegisterOutput):
     """
-    Shifts out a byte of data on a data pin with a clock pin.
+    Class to manage a shift register device.
+
+    If an SPI bus wired to the register's data and clock inputs is given,
+    writes are sent through it in one transfer instead of being bit-banged.
+    The bus must be set up with the matching firstbit; reads are always
+    bit-banged on data_pin and clock_pin.
     """
-    if isinstance(bit_order, str):
-        bit_order = MSB_FIRST if bit_order == "MSBFIRST" else LSB_FIRST
+    
+    def __init__(self, data_pin, clock_pin, latch_pin, num_bytes=1, bit_order=MSB_FIRST,
+                 spi=None):
+        super().__init__(latch_pin, num_bytes, bit_order)
+        self.data_pin = data_pin
+        self.clock_pin = clock_pin
+        self.spi = spi
+        # bound pin methods, cached to skip the lookups on every transfer
+        self._data = data_pin.value
+        self._clock = clock_pin.value
 
-    value = max(0, min(value, 255))
+    def _shift_out_state(self):
+        if self.spi:
+            self._latch(0)
+            self.spi.write(self.current_state)
+            self._latch(1)
+            self._latch(0)
+            return
+        _shift_out_bytes(self._data, self._clock, self._latch,
+                         self.current_state, self.bit_order)
 
-    def pulse_clock():
-        clock_pin.value(1)
-        time.sleep_us(1)
-        clock_pin.value(0)
-        time.sleep_us(1)
+    def read(self):
+        return _shift_in_bytes(self._data, self._clock, self._latch,
+                               self.num_bytes, self.bit_order)
 
-    for i in range(8):
-        if bit_order == MSB_FIRST:
-            bit = (value >> (7 - i)) & 1
-        else:
-            bit = (value >> i) & 1
+def shift_out(data_pin, clock_pin, value, bit_order=MSB_FIRST):
+    """
+    Shifts out a byte of data on a data pin with a clock pin.
 
-        data_pin.value(bit)
-        pulse_clock()
+    bit_order must be MSB_FIRST or LSB_FIRST.
+    """
+    value = max(0, min(value, 255))
+
+    if _shift_delay:
+        _shift_out_delayed(data_pin.value, clock_pin.value, value, bit_order)
+    elif bit_order == MSB_FIRST:
+        _shift_out_msb(data_pin.value, clock_pin.value, value)
+    else:
+        _shift_out_lsb(data_pin.value, clock_pin.value, value)
 
 def shift_in(data_pin, clock_pin, bit_order=MSB_FIRST):
     """
     Shifts in a byte of data using a data pin and clock pin.
+
+    bit_order must be MSB_FIRST or LSB_FIRST.
     """
-    if isinstance(bit_order, str):
-        bit_order = MSB_FIRST if bit_order == "MSBFIRST" else LSB_FIRST
+    if _shift_delay:
+        return _shift_in_delayed(data_pin.value, clock_pin.value, bit_order)
+    if bit_order == MSB_FIRST:
+        return _shift_in_msb(data_pin.value, clock_pin.value)
+    return _shift_in_lsb(data_pin.value, clock_pin.value)
 
-    def read_bit():
-        clock_pin.value(1)
-        time.sleep_us(1)
-        bit = data_pin.value()
-        clock_pin.value(0)
-        time.sleep_us(1)
-        return bit
+def set_shift_delay(iterations):
+    """
+    Sets how long each shift register clock and latch level is held.
 
+    The delay is a number of busy-wait loop iterations. The default of 0
+    shifts as fast as the pins can be written, which suits 74HC595-style
+    registers; raise it for slower devices or long wiring.
+    """
+    global _shift_delay
+    _shift_delay = iterations
+
+@micropython.native
+def _hold(iterations):
+    """
+    Busy-waits for the given number of loop iterations.
+    """
+    for _ in range(iterations):
+        pass
+
+def _shift_out_delayed(data, clock, value, bit_order):
+    """
+    Clocks out a byte, holding each clock level for the shift delay.
+    """
+    for i in range(8):
+        data(value >> (7 - i if bit_order == MSB_FIRST else i) & 1)
+        clock(1)
+        _hold(_shift_delay)
+        clock(0)
+        _hold(_shift_delay)
+
+def _shift_in_delayed(data, clock, bit_order):
+    """
+    Clocks in a byte, holding each clock level for the shift delay.
+    """
     value = 0
     for i in range(8):
-        bit = read_bit()
-        if bit_order == MSB_FIRST:
-            value = (value << 1) | bit
-        else:
-            value |= bit << i
+        clock(1)
+        _hold(_shift_delay)
+        value |= data() << (7 - i if bit_order == MSB_FIRST else i)
+        clock(0)
+        _hold(_shift_delay)
+    return value
+
+# The bit-banging loops below are unrolled and compiled to machine code.
+# They take the pins' bound value methods so no attribute lookups happen
+# per bit, and a native pin write already outlasts the shift register's
+# minimum clock pulse width, so no delays are needed.
+
+@micropython.native
+def _shift_out_msb(data, clock, value):
+    """
+    Clocks out a byte, most significant bit first.
+    """
+    data(value >> 7 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 6 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 5 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 4 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 3 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 2 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 1 & 1)
+    clock(1)
+    clock(0)
+    data(value & 1)
+    clock(1)
+    clock(0)
 
+@micropython.native
+def _shift_out_lsb(data, clock, value):
+    """
+    Clocks out a byte, least significant bit first.
+    """
+    data(value & 1)
+    clock(1)
+    clock(0)
+    data(value >> 1 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 2 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 3 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 4 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 5 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 6 & 1)
+    clock(1)
+    clock(0)
+    data(value >> 7 & 1)
+    clock(1)
+    clock(0)
+
+@micropython.native
+def _shift_in_msb(data, clock):
+    """
+    Clocks in a byte, most significant bit first.
+    """
+    value = 0
+    clock(1)
+    value |= data() << 7
+    clock(0)
+    clock(1)
+    value |= data() << 6
+    clock(0)
+    clock(1)
+    value |= data() << 5
+    clock(0)
+    clock(1)
+    value |= data() << 4
+    clock(0)
+    clock(1)
+    value |= data() << 3
+    clock(0)
+    clock(1)
+    value |= data() << 2
+    clock(0)
+    clock(1)
+    value |= data() << 1
+    clock(0)
+    clock(1)
+    value |= data()
+    clock(0)
+    return value
+
+@micropython.native
+def _shift_in_lsb(data, clock):
+    """
+    Clocks in a byte, least significant bit first.
+    """
+    value = 0
+    clock(1)
+    value |= data()
+    clock(0)
+    clock(1)
+    value |= data() << 1
+    clock(0)
+    clock(1)
+    value |= data() << 2
+    clock(0)
+    clock(1)
+    value |= data() << 3
+    clock(0)
+    clock(1)
+    value |= data() << 4
+    clock(0)
+    clock(1)
+    value |= data() << 5
+    clock(0)
+    clock(1)
+    value |= data() << 6
+    clock(0)
+    clock(1)
+    value |= data() << 7
+    clock(0)
     return value